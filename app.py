@@ -2,22 +2,44 @@
 MediGuard Flask Application - Complete Full-Stack Health Management System
 Personal health management system for prescription tracking, medicine authenticity, and reminders.
 """
+import hashlib
+import hmac
+import importlib.util
+import json
 import os
+import queue
+import re
 import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, send_from_directory
+from functools import cache, wraps
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, send_from_directory, g
+from flask.json.provider import DefaultJSONProvider
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from database import db, User, Prescription, Medicine, AuthenticityLog, Reminder
+from sqlalchemy import String, TypeDecorator, case, event, func, insert, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.orm import aliased, selectinload
+from database import db, User, Prescription, PrescriptionPage, Medicine, AuthenticityLog, Reminder, ScanJob, OCRCache
 from scheduler import scheduler, start_scheduler, stop_scheduler, reschedule_existing_reminders, schedule_reminder, unschedule_reminder
 
-# Graceful imports for OCR and barcode libraries
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-except ImportError:
-    EASYOCR_AVAILABLE = False
+# Keep OCR/vision libraries single-threaded: their OpenMP pools oversubscribe cores
+# when several requests run OCR at once. Must be set before those libraries load.
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+os.environ.setdefault('MKL_NUM_THREADS', '1')
+
+# Graceful imports for OCR and barcode libraries.
+# EasyOCR (PyTorch), OpenCV and pyzbar are slow to import, so they are only looked
+# up here and imported on first use (see _get_easyocr, _get_cv2, _get_pyzbar).
+EASYOCR_AVAILABLE = importlib.util.find_spec('easyocr') is not None
+CV2_AVAILABLE = importlib.util.find_spec('cv2') is not None
+PYZBAR_AVAILABLE = importlib.util.find_spec('pyzbar') is not None
 
 try:
     import pytesseract
@@ -27,17 +49,22 @@ except ImportError:
     PYTESSERACT_AVAILABLE = False
 
 try:
-    import cv2
-    import numpy as np
-    CV2_AVAILABLE = True
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
 except ImportError:
-    CV2_AVAILABLE = False
+    TESSEROCR_AVAILABLE = False
 
 try:
-    from pyzbar import pyzbar
-    PYZBAR_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    PYZBAR_AVAILABLE = False
+    ORJSON_AVAILABLE = False
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(32))
@@ -50,13 +77,122 @@ if db_uri and db_uri.startswith('postgres://'):
 app.config['SQLALCHEMY_DATABASE_URI'] = db_uri or 'sqlite:///mediaguard.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Engine tuning: a larger compiled-statement cache everywhere; a sized connection
+# pool with liveness checks for server databases (SQLite keeps its default pool)
+engine_options = {'query_cache_size': 1200}
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    engine_options.update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 20)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        pool_recycle=1800,
+        pool_pre_ping=True
+    )
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+    # Stop runaway queries instead of letting them hold a pooled connection
+    engine_options['connect_args'] = {'options': '-c statement_timeout=5000'}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
 # Upload folder configuration
 app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_FOLDER', 'uploaded_prescriptions')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
 
+# Barcode scanning returns demo data unless real pyzbar scanning is switched on
+app.config['BARCODE_SCAN_ENABLED'] = os.environ.get('BARCODE_SCAN_ENABLED') == 'true'
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+    Keeps Flask's sorted keys and falls back to its default() for types orjson
+    doesn't handle (e.g. Decimal); datetimes are encoded natively as ISO 8601.
+    jsonify() always passes formatting options: separators (orjson's output is
+    already compact) or, in debug, indent (mapped to OPT_INDENT_2). Any other json
+    module option (e.g. the session serializer's object_hook) goes to the stdlib
+    provider, since orjson has no equivalent.
+    """
+    option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS if ORJSON_AVAILABLE else 0
+    
+    def dumps(self, obj, **kwargs):
+        formatting = {key: kwargs.pop(key) for key in ('indent', 'separators') if key in kwargs}
+        if kwargs:
+            return super().dumps(obj, **formatting, **kwargs)
+        option = self.option
+        if formatting.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
+
 db.init_app(app)
 
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite so the scheduler thread and web requests don't block each other."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.execute('PRAGMA cache_size=-64000')
+    cursor.close()
+
+
+class MinuteStringType(TypeDecorator):
+    """Result type of minute_string; formats timestamps in Python where the database didn't."""
+    impl = String
+    cache_ok = True
+    
+    def process_result_value(self, value, dialect):
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M')
+        return value
+
+
+class minute_string(FunctionElement):
+    """SQL expression formatting a timestamp as 'YYYY-MM-DD HH:MM' in the database."""
+    type = MinuteStringType()
+    inherit_cache = True
+
+
+@compiles(minute_string)
+def compile_minute_string(element, compiler, **kw):
+    """Portable fallback: select the timestamp itself and let MinuteStringType format it."""
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(minute_string, 'sqlite')
+def compile_minute_string_sqlite(element, compiler, **kw):
+    """SQLite rendering."""
+    return "strftime('%%Y-%%m-%%d %%H:%%M', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(minute_string, 'postgresql')
+def compile_minute_string_postgresql(element, compiler, **kw):
+    """PostgreSQL rendering."""
+    return "to_char(%s, 'YYYY-MM-DD HH24:MI')" % compiler.process(element.clauses, **kw)
+
+
+@compiles(minute_string, 'mysql')
+def compile_minute_string_mysql(element, compiler, **kw):
+    """MySQL/MariaDB rendering."""
+    return "DATE_FORMAT(%s, '%%Y-%%m-%%d %%H:%%i')" % compiler.process(element.clauses, **kw)
+
+
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
+MEDICINES_PER_STATUS = 10  # Medicines listed per status on the medicines page
+MEDICINES_PAGE_SIZE = 50  # Medicines per page when viewing a single status
+MEDICINE_STATUSES = ('valid', 'fake', 'suspicious', 'unverified')
 
 
 def allowed_file(filename):
@@ -64,17 +200,138 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def dump_json_bytes(data):
+    """Serialize data to compact UTF-8 JSON, with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_body_response(body):
+    """Wrap already-serialized JSON bytes in a response."""
+    return app.response_class(body, mimetype='application/json')
+
+
+def current_user_id():
+    """
+    Return the logged-in user's ID, reading the session at most once per request.
+    Read lazily rather than in a before_request hook, so requests that never need
+    it (health checks, uploaded images) don't decode the cookie or get Vary: Cookie.
+    
+    Returns:
+        int or None
+    """
+    if 'user_id' not in g:
+        g.user_id = session.get('user_id')
+    return g.user_id
+
+
+def current_user():
+    """
+    Return the logged-in User, querying it at most once per request.
+    
+    Returns:
+        User or None
+    """
+    if 'user' not in g:
+        user_id = current_user_id()
+        g.user = db.session.get(User, user_id) if user_id is not None else None
+    return g.user
+
+
 def login_required(f):
     """Decorator to require login for routes."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
+        if current_user_id() is None:
             flash('Please log in first.', 'warning')
             return redirect(url_for('login'))
         return f(*args, **kwargs)
     return decorated_function
 
 
+# Password hashing is deliberately slow, so successful checks are remembered briefly.
+# Keys are the stored hash plus an HMAC of the password, never the password itself.
+PASSWORD_CHECK_CACHE_SIZE = 1024
+_PASSWORD_CHECK_CACHE = OrderedDict()
+_PASSWORD_CHECK_CACHE_LOCK = threading.Lock()
+
+
+@cache
+def _dummy_password_hash():
+    """Hash checked for unknown usernames, so they take as long as wrong passwords."""
+    return generate_password_hash(secrets.token_hex(16))
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password against its stored hash, skipping the KDF for recently verified pairs.
+    
+    Args:
+        password_hash: Stored password hash (None for an unknown user)
+        password: Password to check
+        
+    Returns:
+        bool
+    """
+    if password_hash is None:
+        check_password_hash(_dummy_password_hash(), password)
+        return False
+    
+    password_mac = hmac.new(app.config['SECRET_KEY'].encode(), password.encode(), 'sha256').digest()
+    key = (password_hash, password_mac)
+    with _PASSWORD_CHECK_CACHE_LOCK:
+        if key in _PASSWORD_CHECK_CACHE:
+            _PASSWORD_CHECK_CACHE.move_to_end(key)
+            return True
+    
+    if not check_password_hash(password_hash, password):
+        return False
+    
+    with _PASSWORD_CHECK_CACHE_LOCK:
+        _PASSWORD_CHECK_CACHE[key] = True
+        if len(_PASSWORD_CHECK_CACHE) > PASSWORD_CHECK_CACHE_SIZE:
+            _PASSWORD_CHECK_CACHE.popitem(last=False)
+    return True
+
+
+# Small in-process cache for read-heavy JSON endpoints; entries expire after a TTL
+# and are deleted explicitly when the underlying rows change.
+AUTH_HISTORY_CACHE_TTL = 60  # seconds
+_RESPONSE_CACHE = {}
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def cache_get(key):
+    """Return the cached value for key, or None if missing or expired."""
+    with _RESPONSE_CACHE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del _RESPONSE_CACHE[key]
+            return None
+        return value
+
+
+def cache_set(key, value, timeout):
+    """Cache value under key for timeout seconds."""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = (time.monotonic() + timeout, value)
+
+
+def cache_delete(key):
+    """Drop key from the cache."""
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.pop(key, None)
+
+
+def invalidate_authenticity_history(user_id):
+    """Forget a user's cached verification history after their scans or medicines change."""
+    cache_delete(f"auth_hist:{user_id}")
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -134,55 +391,390 @@ def uploaded_file(filename):
 # FUNCTIONAL UTILITIES - OCR & QR/BARCODE SCANNING
 # ============================================================================
 
-def extract_from_prescription(image_path):
+@cache
+def _get_easyocr():
+    """Import EasyOCR on first use; None if it cannot be imported."""
+    try:
+        import easyocr
+    except ImportError:
+        return None
+    return easyocr
+
+
+@cache
+def _get_cv2():
+    """Import OpenCV on first use; None if it cannot be imported."""
+    try:
+        import cv2
+    except ImportError:
+        return None
+    cv2.setNumThreads(1)
+    return cv2
+
+
+@cache
+def _get_pyzbar():
+    """Import pyzbar on first use; None if it (or the zbar library) cannot be imported."""
+    try:
+        from pyzbar import pyzbar
+    except ImportError:
+        return None
+    return pyzbar
+
+
+# EasyOCR model is expensive to load, so a single reader is shared across requests
+_EASYOCR_READER = None
+_EASYOCR_READER_LOCK = threading.Lock()
+
+
+def get_easyocr_reader():
     """
-    Extract text from prescription image using OCR (EasyOCR or pytesseract).
-    Returns structured medicine data.
+    Return the shared EasyOCR reader, creating it on first use.
+    
+    Returns:
+        easyocr.Reader instance
+    """
+    global _EASYOCR_READER
+    if _EASYOCR_READER is None:
+        with _EASYOCR_READER_LOCK:
+            if _EASYOCR_READER is None:
+                easyocr = _get_easyocr()
+                if easyocr is None:
+                    raise ImportError("EasyOCR could not be imported")
+                import torch
+                _EASYOCR_READER = easyocr.Reader(
+                    ['en'],
+                    gpu=torch.cuda.is_available(),
+                    cudnn_benchmark=True
+                )
+    return _EASYOCR_READER
+
+
+# tesserocr APIs keep the Tesseract model loaded in-process but are not thread-safe,
+# so each OCR call checks one out of a small pool
+TESSEROCR_POOL_SIZE = int(os.environ.get('TESSEROCR_POOL_SIZE', 2))
+TESSEROCR_POOL_TIMEOUT = 30  # seconds to wait for a free API before giving up
+_TESS_POOL = queue.Queue()
+_TESS_POOL_CREATED = 0
+_TESS_POOL_LOCK = threading.Lock()
+
+
+def _acquire_tess_api():
+    """Take a tesserocr API from the pool, creating one if the pool is not full."""
+    global _TESS_POOL_CREATED
+    try:
+        return _TESS_POOL.get_nowait()
+    except queue.Empty:
+        pass
+    
+    with _TESS_POOL_LOCK:
+        if _TESS_POOL_CREATED < TESSEROCR_POOL_SIZE:
+            # Only count the slot once the API exists, so a failed init (e.g. missing
+            # tessdata) doesn't leave later callers waiting on an API that never comes
+            api = PyTessBaseAPI(psm=PSM.AUTO)
+            _TESS_POOL_CREATED += 1
+            return api
+    # queue.Empty propagates so the caller can fall back to pytesseract
+    return _TESS_POOL.get(timeout=TESSEROCR_POOL_TIMEOUT)
+
+
+def tesserocr_image_to_text(image):
+    """
+    Run Tesseract in-process through tesserocr.
+    
+    Args:
+        image: Path to image file, or 8-bit grayscale numpy array
+        
+    Returns:
+        tuple (text, mean word confidence 0-100)
+    """
+    api = _acquire_tess_api()
+    try:
+        if isinstance(image, str):
+            api.SetImageFile(image)
+        else:
+            height, width = image.shape
+            api.SetImageBytes(image.tobytes(), width, height, 1, width)
+        return api.GetUTF8Text(), api.MeanTextConf()
+    finally:
+        _TESS_POOL.put(api)
+
+
+def pytesseract_image_to_text(image):
+    """
+    Run Tesseract through pytesseract, keeping per-word confidences.
+    
+    Args:
+        image: Path to image file, or 8-bit grayscale numpy array
+        
+    Returns:
+        tuple (text, mean word confidence 0-100)
+    """
+    if isinstance(image, str):
+        image = Image.open(image)
+    data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+    
+    # Rebuild the text line by line from the recognized words
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        confidence = float(data['conf'][i])
+        if confidence < 0 or not word.strip():
+            continue
+        confidences.append(confidence)
+        line_key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(line_key, []).append(word)
+    
+    text = '\n'.join(' '.join(words) for words in lines.values())
+    return text, (sum(confidences) / len(confidences) if confidences else 0)
+
+
+def run_tesseract_ocr(image_path):
+    """
+    Run Tesseract on an image, in-process via tesserocr when installed.
     
     Args:
         image_path: Path to image file
         
     Returns:
-        dict with 'raw_text' and 'medicines' list
+        tuple (text, mean word confidence 0-100); ('', 0) if Tesseract is unavailable or fails
+    """
+    if not (TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE):
+        return '', 0
+    
+    image = preprocess_for_ocr(image_path, binarize=True)
+    
+    if TESSEROCR_AVAILABLE:
+        try:
+            return tesserocr_image_to_text(image)
+        except Exception as e:
+            print(f"Tesserocr error: {e}")
+    
+    if PYTESSERACT_AVAILABLE:
+        try:
+            return pytesseract_image_to_text(image)
+        except Exception as e:
+            print(f"Pytesseract error: {e}")
+    
+    return '', 0
+
+
+def load_cached_ocr(image_hash):
+    """
+    Look up a stored OCR result for an image produced by an installed backend,
+    preferring EasyOCR's read when both are stored.
+    
+    Args:
+        image_hash: Hex digest of the image bytes
+        
+    Returns:
+        tuple (raw_text, medicines) or None if not cached
+    """
+    backends = [name for name, available in (
+        ('easyocr', EASYOCR_AVAILABLE),
+        ('tesseract', TESSEROCR_AVAILABLE or PYTESSERACT_AVAILABLE)
+    ) if available]
+    if not backends:
+        return None
+    
+    try:
+        entry = OCRCache.query.filter(
+            OCRCache.image_hash == image_hash,
+            OCRCache.backend.in_(backends)
+        ).order_by(case((OCRCache.backend == 'easyocr', 0), else_=1)).first()
+        if entry:
+            return entry.raw_text, json.loads(entry.medicines_json)
+    except Exception as e:
+        print(f"OCR cache lookup error: {e}")
+    return None
+
+
+def store_cached_ocr(image_hash, backend, raw_text, medicines):
+    """
+    Store an OCR result so repeat uploads of the same image skip OCR.
+    
+    Args:
+        image_hash: Hex digest of the image bytes
+        backend: OCR backend that produced the text ('easyocr' or 'tesseract')
+        raw_text: Extracted text
+        medicines: Parsed medicines list
     """
     try:
-        raw_text = ""
+        db.session.merge(OCRCache(
+            image_hash=image_hash,
+            backend=backend,
+            raw_text=raw_text,
+            medicines_json=json.dumps(medicines)
+        ))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"OCR cache store error: {e}")
+
+
+# OCR time grows with pixel count, so large phone photos are shrunk before recognition
+OCR_MAX_DIMENSION = 1600
+
+# Tesseract results below this mean word confidence are re-read with EasyOCR
+OCR_CONFIDENCE_THRESHOLD = 70
+
+OCR_UNAVAILABLE_TEXT = "OCR extraction not available. Please install EasyOCR or Tesseract."
+
+
+def preprocess_for_ocr(image_path, binarize=False):
+    """
+    Load an image as grayscale, downscaled so its longest side is at most OCR_MAX_DIMENSION.
+    
+    Args:
+        image_path: Path to image file
+        binarize: Apply Otsu thresholding (makes Tesseract noticeably faster)
         
-        # Try EasyOCR first (more modern, better accuracy)
-        if EASYOCR_AVAILABLE:
-            try:
-                reader = easyocr.Reader(['en'])
-                result = reader.readtext(image_path)
-                raw_text = '\n'.join([text[1] for text in result])
-            except Exception as e:
-                print(f"EasyOCR error: {e}")
+    Returns:
+        numpy array, or image_path unchanged if OpenCV is unavailable or cannot read it
+    """
+    cv2 = _get_cv2()
+    if cv2 is None:
+        return image_path
+    
+    try:
+        image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            return image_path
         
-        # Fallback to pytesseract
-        if not raw_text and PYTESSERACT_AVAILABLE:
-            try:
-                image = Image.open(image_path)
-                raw_text = pytesseract.image_to_string(image)
-            except Exception as e:
-                print(f"Pytesseract error: {e}")
+        height, width = image.shape
+        scale = OCR_MAX_DIMENSION / max(height, width)
+        if scale < 1:
+            image = cv2.resize(
+                image,
+                (round(width * scale), round(height * scale)),
+                interpolation=cv2.INTER_AREA
+            )
         
-        # If no OCR available, return placeholder
-        if not raw_text:
-            raw_text = "OCR extraction not available. Please install EasyOCR or Tesseract."
+        if binarize:
+            _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return image
+    except Exception as e:
+        print(f"Image preprocessing error: {e}")
+        return image_path
+
+
+def new_image_hasher():
+    """
+    Return a hasher for OCR cache keys.
+    The key is not a security boundary, so a fast non-cryptographic hash is used.
+    """
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_64()
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_image_file(image_path):
+    """Return the OCR cache key for an image file."""
+    hasher = new_image_hasher()
+    with open(image_path, 'rb') as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def save_upload(file, filepath):
+    """
+    Stream an uploaded file to disk, computing its OCR cache key on the way.
+    
+    Args:
+        file: Werkzeug FileStorage from request.files
+        filepath: Destination path
         
-        # Parse text to extract medicines (simple regex-based parsing)
-        medicines = parse_medicines_from_text(raw_text)
+    Returns:
+        OCR cache key of the file contents
+    """
+    hasher = new_image_hasher()
+    with open(filepath, 'wb') as f:
+        while chunk := file.stream.read(1 << 20):
+            hasher.update(chunk)
+            f.write(chunk)
+    return hasher.hexdigest()
+
+
+def build_extraction_result(page_results):
+    """
+    Merge per-page OCR results into one result for review.
+    Pages without text are left out of the joined text, and the sample medicine
+    to edit is added once, only when no page yielded any medicines.
+    
+    Args:
+        page_results: Page dicts from extract_from_prescription(s_batch), in page order
         
-        return {
-            'raw_text': raw_text,
-            'medicines': medicines if medicines else [
-                {
-                    'name': 'Sample Medicine',
-                    'dosage': '500mg',
-                    'timing': '2x/day',
-                    'duration': 7
-                }
-            ]
-        }
+    Returns:
+        dict with 'raw_text' and 'medicines' list
+    """
+    raw_text = '\n\n'.join(r['raw_text'] for r in page_results if r['raw_text'])
+    medicines = [m for r in page_results for m in r['medicines']]
+    return {
+        'raw_text': raw_text or OCR_UNAVAILABLE_TEXT,
+        'medicines': medicines if medicines else [
+            {
+                'name': 'Sample Medicine',
+                'dosage': '500mg',
+                'timing': '2x/day',
+                'duration': 7
+            }
+        ]
+    }
+
+
+def is_confident_tesseract_result(raw_text, confidence, medicines):
+    """Whether a Tesseract read is good enough to skip the slower EasyOCR pass."""
+    return bool(raw_text) and confidence >= OCR_CONFIDENCE_THRESHOLD and bool(medicines)
+
+
+def extract_from_prescription(image_path, image_hash=None):
+    """
+    Extract text from prescription image using OCR.
+    Tesseract (fast on CPU) runs first; EasyOCR (more accurate) re-reads the image
+    only when Tesseract is unsure. Results are cached by image content, so
+    re-uploads skip OCR.
+    Returns structured medicine data for this page only; see build_extraction_result.
+    
+    Args:
+        image_path: Path to image file
+        image_hash: OCR cache key if already known (see save_upload)
+        
+    Returns:
+        dict with 'raw_text' ('' if no OCR backend read anything) and 'medicines' list
+    """
+    try:
+        if image_hash is None:
+            image_hash = hash_image_file(image_path)
+        
+        cached = load_cached_ocr(image_hash)
+        if cached:
+            raw_text, medicines = cached
+        else:
+            # Cheap pass first
+            raw_text, confidence = run_tesseract_ocr(image_path)
+            medicines = parse_medicines_from_text(raw_text) if raw_text else []
+            # Only cache reads we trust; an unsure Tesseract read is retried next time
+            confident = is_confident_tesseract_result(raw_text, confidence, medicines)
+            backend = 'tesseract' if confident else None
+            
+            # Escalate to EasyOCR on low confidence or when no medicines were found
+            if EASYOCR_AVAILABLE and not confident:
+                try:
+                    reader = get_easyocr_reader()
+                    result = reader.readtext(preprocess_for_ocr(image_path))
+                    easyocr_text = '\n'.join([text[1] for text in result])
+                    if easyocr_text:
+                        raw_text = easyocr_text
+                        medicines = parse_medicines_from_text(raw_text)
+                        backend = 'easyocr'
+                except Exception as e:
+                    print(f"EasyOCR error: {e}")
+            
+            if backend:
+                store_cached_ocr(image_hash, backend, raw_text, medicines)
+        
+        return {'raw_text': raw_text, 'medicines': medicines}
     except Exception as e:
         print(f"OCR Error: {str(e)}")
         return {
@@ -191,33 +783,168 @@ def extract_from_prescription(image_path):
         }
 
 
+def extract_from_prescriptions_batch(image_paths, image_hashes=None):
+    """
+    Extract text from several prescription images (e.g. pages of one prescription).
+    Each uncached page gets the Tesseract pass; the pages it is unsure about are
+    sent to EasyOCR together in a single batched call.
+    
+    Args:
+        image_paths: List of image file paths
+        image_hashes: OCR cache keys matching image_paths, if already known
+        
+    Returns:
+        list of dicts with 'raw_text' and 'medicines', in input order
+    """
+    if image_hashes is None:
+        image_hashes = [None] * len(image_paths)
+    
+    if not EASYOCR_AVAILABLE:
+        return [
+            extract_from_prescription(path, image_hash)
+            for path, image_hash in zip(image_paths, image_hashes)
+        ]
+    
+    results = [None] * len(image_paths)
+    pending = []
+    for index, (path, image_hash) in enumerate(zip(image_paths, image_hashes)):
+        try:
+            if image_hash is None:
+                image_hash = hash_image_file(path)
+        except Exception as e:
+            print(f"OCR Error: {str(e)}")
+            results[index] = {'raw_text': f'Error: {str(e)}', 'medicines': []}
+            continue
+        
+        cached = load_cached_ocr(image_hash)
+        if cached:
+            raw_text, medicines = cached
+            results[index] = {'raw_text': raw_text, 'medicines': medicines}
+            continue
+        
+        raw_text, confidence = run_tesseract_ocr(path)
+        medicines = parse_medicines_from_text(raw_text) if raw_text else []
+        if is_confident_tesseract_result(raw_text, confidence, medicines):
+            store_cached_ocr(image_hash, 'tesseract', raw_text, medicines)
+            results[index] = {'raw_text': raw_text, 'medicines': medicines}
+        else:
+            pending.append((index, path, image_hash, raw_text, medicines))
+    
+    if pending:
+        try:
+            reader = get_easyocr_reader()
+            # Images are resized to a common size so they share one forward pass
+            batch = reader.readtext_batched(
+                [preprocess_for_ocr(path) for _, path, _, _, _ in pending],
+                n_width=800,
+                n_height=600
+            )
+        except Exception as e:
+            print(f"EasyOCR batch error: {e}")
+            batch = [[] for _ in pending]
+        
+        for (index, path, image_hash, raw_text, medicines), result in zip(pending, batch):
+            easyocr_text = '\n'.join([text[1] for text in result])
+            if easyocr_text:
+                raw_text = easyocr_text
+                medicines = parse_medicines_from_text(raw_text)
+                store_cached_ocr(image_hash, 'easyocr', raw_text, medicines)
+            results[index] = {'raw_text': raw_text, 'medicines': medicines}
+    
+    return results
+
+
+# One pass over the whole OCR text: a stripped line of 3+ characters mentioning a
+# medicine keyword yields its first word or two as the name, plus the first dosage
+# and frequency found anywhere on it (in either order)
+_MEDICINE_LINE_RE = re.compile(
+    r'^[^\S\n]*(?=\S[^\n]+\S)(?=[^\n]*(?:mg|tablet|cap|dose|mcg|ml))'
+    r'(?=(?:[^\n]*?(?P<dose>\d+(?:\.\d+)?[ \t]*(?:mg|mcg|ml)\b))?)'
+    r'(?=(?:[^\n]*?(?P<freq>\d+[ \t]*x[ \t]*/?[ \t]*day))?)'
+    r'(?P<name>\S+(?:[^\S\n]+(?!\d)\S+)?)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+
 def parse_medicines_from_text(text):
     """
     Parse extracted text to identify medicines.
     This is a simple parser; in production, use more sophisticated NLP.
     """
-    medicines = []
-    lines = text.split('\n')
+    return [
+        {
+            'name': ' '.join(match['name'].split())[:100],
+            'dosage': match['dose'] or '500mg',
+            'timing': ''.join(match['freq'].split()) if match['freq'] else '2x/day',
+            'duration': 7
+        }
+        for match in _MEDICINE_LINE_RE.finditer(text)
+    ]
+
+
+_BATCH_RE = re.compile(r'BATCH[A-Z0-9]+', re.IGNORECASE)
+_EXPIRY_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def barcode_data_from_codes(codes):
+    """
+    Build scan data from decoded barcode payloads.
     
-    for line in lines:
-        line = line.strip()
-        if not line or len(line) < 3:
-            continue
+    Args:
+        codes: List of decoded barcode/QR strings
         
-        # Check for medicine indicators
-        if any(keyword in line.lower() for keyword in ['mg', 'tablet', 'cap', 'dose', 'mcg', 'ml']):
-            # Extract medicine details
-            name_part = line.split()[0:2]
-            name = ' '.join(name_part) if name_part else 'Unknown Medicine'
-            
-            medicines.append({
-                'name': name[:100],
-                'dosage': '500mg',
-                'timing': '2x/day',
-                'duration': 7
-            })
+    Returns:
+        dict with code, codes, batch, expiry and manufacturer
+    """
+    payload = ' '.join(codes)
+    batch = _BATCH_RE.search(payload)
+    expiry = _EXPIRY_RE.search(payload)
+    return {
+        'code': codes[0] if codes else 'No barcode/QR code detected',
+        'codes': codes,
+        'batch': batch.group(0) if batch else 'UNKNOWN',
+        'expiry': expiry.group(0) if expiry else 'Not detected',
+        'manufacturer': 'Unknown'
+    }
+
+
+def barcode_candidates(cv2, image):
+    """
+    Yield (stage, image) variants of a grayscale image for pyzbar, cheapest first.
+    Noisy or rotated phone photos often only decode after cleanup or rotation.
+    """
+    yield 'original', image
+    yield 'adaptive_threshold', cv2.adaptiveThreshold(
+        image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    )
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    yield 'morph_open', cv2.morphologyEx(image, cv2.MORPH_OPEN, kernel)
+    for stage, rotation in (
+        ('rotate_90', cv2.ROTATE_90_CLOCKWISE),
+        ('rotate_180', cv2.ROTATE_180),
+        ('rotate_270', cv2.ROTATE_90_COUNTERCLOCKWISE)
+    ):
+        yield stage, cv2.rotate(image, rotation)
+
+
+def decode_barcodes(cv2, pyzbar, image):
+    """
+    Decode QR codes/barcodes, stopping at the first preprocessing stage that finds any.
     
-    return medicines
+    Args:
+        cv2: OpenCV module
+        pyzbar: pyzbar module
+        image: Grayscale numpy array
+        
+    Returns:
+        list of decoded strings (empty if nothing was found)
+    """
+    for stage, candidate in barcode_candidates(cv2, image):
+        symbols = pyzbar.decode(candidate)
+        if symbols:
+            print(f"Barcode decoded at stage: {stage}")
+            return [symbol.data.decode('utf-8', errors='replace') for symbol in symbols]
+    return []
 
 
 def scan_qr_barcode(image_path):
@@ -232,8 +959,16 @@ def scan_qr_barcode(image_path):
         dict with scanned data
     """
     try:
-        # Always return simulated demo data for consistent testing
-        # In production, use pyzbar + OpenCV if available
+        cv2 = _get_cv2() if app.config['BARCODE_SCAN_ENABLED'] else None
+        pyzbar = _get_pyzbar() if cv2 else None
+        if pyzbar:
+            # Decode straight to grayscale so no separate colour conversion is needed
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                raise ValueError(f"Could not read image {image_path}")
+            return barcode_data_from_codes(decode_barcodes(cv2, pyzbar, image))
+        
+        # Simulated demo data for consistent testing
         return {
             'code': 'MG-VALID-ABC123-BATCH2024',
             'codes': ['MG-VALID-ABC123-BATCH2024'],
@@ -253,6 +988,139 @@ def scan_qr_barcode(image_path):
         }
 
 
+def run_ocr_job(job_id, filepaths, image_hashes=None):
+    """
+    Run OCR for an uploaded prescription and store the review data on its ScanJob.
+    
+    Args:
+        job_id: ID of the ScanJob
+        filepaths: Paths of the uploaded images, in page order
+        image_hashes: OCR cache keys of the images, if computed during upload
+    """
+    with app.app_context():
+        job = db.session.get(ScanJob, job_id)
+        if not job:
+            return
+        
+        job.status = 'processing'
+        db.session.commit()
+        
+        try:
+            # Batch multi-page uploads through a single OCR call
+            if len(filepaths) > 1:
+                extraction_results = extract_from_prescriptions_batch(filepaths, image_hashes)
+            else:
+                image_hash = image_hashes[0] if image_hashes else None
+                extraction_results = [extract_from_prescription(filepaths[0], image_hash)]
+            
+            extraction = build_extraction_result(extraction_results)
+            job.result_json = json.dumps({
+                'filepath': filepaths[0],
+                'filepaths': filepaths,
+                'raw_text': extraction['raw_text'],
+                'medicines': extraction['medicines'],
+                'image_paths': [f"/{path.replace(chr(92), '/')}" for path in filepaths]
+            })
+            job.status = 'done'
+        except Exception as e:
+            print(f"OCR job {job_id} error: {str(e)}")
+            # The error may have come from the session itself; reset it before recording the failure
+            db.session.rollback()
+            job.result_json = json.dumps({'error': str(e)})
+            job.status = 'failed'
+        
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"OCR job {job_id} status update error: {str(e)}")
+
+
+def submit_ocr_job(job_id, filepaths, image_hashes=None):
+    """
+    Start an OCR job without blocking the request.
+    Uses the APScheduler thread pool when the scheduler is running, otherwise a worker thread.
+    
+    Args:
+        job_id: ID of the ScanJob
+        filepaths: Paths of the uploaded images, in page order
+        image_hashes: OCR cache keys of the images, if computed during upload
+    """
+    job_args = [job_id, filepaths, image_hashes]
+    if scheduler.running:
+        scheduler.add_job(
+            run_ocr_job,
+            args=job_args,
+            id=f"ocr_{job_id}",
+            misfire_grace_time=None
+        )
+    else:
+        threading.Thread(target=run_ocr_job, args=job_args, daemon=True).start()
+
+
+# Barcode classification rules in priority order:
+# (name, matcher, status, confidence, detail template); a code with no marker is accepted as recognized
+CODE_RULES = [
+    ('valid', re.compile(r'VALID|.*?MG-VALID', re.DOTALL), "valid", 95, "✓ Valid MediGuard barcode format detected"),
+    ('fake', re.compile(r'.*?(?:FAKE|FRAUD)', re.DOTALL), "fake", 99, "✗ Counterfeited medicine pattern detected"),
+    ('err', re.compile(r'.*?ERROR', re.DOTALL), "suspicious", 20, "⚠ Error scanning barcode - unable to verify"),
+]
+CODE_RULE_DEFAULT = ("valid", 80, "✓ Barcode recognized: {code}")
+_EXP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+
+def _compile_code_rules(rules, default):
+    """
+    Generate the barcode classifier from the rule table.
+    The rules never change at runtime, so they are unrolled once into an if-chain
+    with the statuses, confidences and details inlined as constants.
+    
+    Args:
+        rules: List of (name, matcher, status, confidence, detail template)
+        default: (status, confidence, detail template) when no rule matches
+        
+    Returns:
+        function(code) -> (status, confidence, detail)
+    """
+    namespace = {}
+    lines = ["def _classify_code(code):"]
+    
+    def emit_return(indent, status, confidence, template):
+        detail = f"{template!r}.format(code=code[:20])" if '{code}' in template else repr(template)
+        lines.append(f"{indent}return {status!r}, {int(confidence)}, {detail}")
+    
+    for name, matcher, status, confidence, template in rules:
+        namespace[f"_match_{name}"] = matcher.match
+        lines.append(f"    if _match_{name}(code):")
+        emit_return("        ", status, confidence, template)
+    emit_return("    ", *default)
+    
+    exec(compile("\n".join(lines), "<code_rules>", "exec"), namespace)
+    return namespace["_classify_code"]
+
+
+_classify_code = _compile_code_rules(CODE_RULES, CODE_RULE_DEFAULT)
+
+
+def parse_expiry_date(expiry):
+    """
+    Parse an expiry date in YYYY-MM-DD form.
+    
+    Args:
+        expiry: Expiry date string
+        
+    Returns:
+        datetime at midnight of the expiry date
+        
+    Raises:
+        ValueError: if the date cannot be parsed
+    """
+    match = _EXP_RE.fullmatch(expiry)
+    if match:
+        return datetime(int(match[1]), int(match[2]), int(match[3]))
+    return datetime.strptime(expiry, '%Y-%m-%d')
+
+
 def verify_medicine_authenticity(barcode_data):
     """
     Apply rules to verify if medicine is genuine, fake, or suspicious.
@@ -274,25 +1142,9 @@ def verify_medicine_authenticity(barcode_data):
     
     # If we have codes, analyze them
     if codes and len(codes) > 0:
-        code = codes[0].upper()
-        
-        # Rule 1: Check for valid prefixes
-        if 'MG-VALID' in code or code.startswith('VALID'):
-            status = "valid"
-            confidence = 95
-            details.append("✓ Valid MediGuard barcode format detected")
-        elif 'FAKE' in code or 'FRAUD' in code or 'TEST-FAKE' in code:
-            status = "fake"
-            confidence = 99
-            details.append("✗ Counterfeited medicine pattern detected")
-        elif 'ERROR' in code:
-            status = "suspicious"
-            confidence = 20
-            details.append("⚠ Error scanning barcode - unable to verify")
-        else:
-            status = "valid"
-            confidence = 80
-            details.append(f"✓ Barcode recognized: {code[:20]}")
+        # Rule 1: Classify the code by its markers
+        status, confidence, detail = _classify_code(codes[0].upper())
+        details.append(detail)
     else:
         details.append("⚠ No barcode detected in image")
         status = "suspicious"
@@ -311,7 +1163,7 @@ def verify_medicine_authenticity(barcode_data):
     # Rule 3: Check expiry date
     if expiry and expiry != 'Not detected':
         try:
-            exp_date = datetime.strptime(expiry, '%Y-%m-%d')
+            exp_date = parse_expiry_date(expiry)
             if exp_date > datetime.now():
                 details.append(f"✓ Expiry valid until {expiry}")
                 confidence = min(95, confidence + 5)
@@ -346,51 +1198,40 @@ def generate_medicine_reminders(medicine_id, user_id, timing, duration_days):
         user_id: ID of the user
         timing: Timing string (e.g., "2x/day", "morning, evening")
         duration_days: Duration in days
-    """
-    try:
-        medicine = Medicine.query.get(medicine_id)
-        if not medicine:
-            return
-        
-        # Parse timing
-        times_per_day = 1
-        if 'x' in timing.lower():
-            try:
-                times_per_day = int(timing.lower().split('x')[0])
-            except:
-                times_per_day = 1
-        
-        # Generate reminders for each day
-        reminders_to_create = []
-        start_date = datetime.now()
-        
-        for day in range(duration_days):
-            for slot in range(times_per_day):
-                # Space reminders throughout the day
-                hour = 6 + (slot * (16 // max(1, times_per_day)))
-                reminder_time = start_date + timedelta(days=day, hours=hour)
-                
-                if reminder_time > datetime.utcnow():
-                    reminder = Reminder(
-                        medicine_id=medicine_id,
-                        user_id=user_id,
-                        reminder_time=reminder_time,
-                        status='pending'
-                    )
-                    reminders_to_create.append(reminder)
-        
-        # Bulk add to database
-        if reminders_to_create:
-            db.session.add_all(reminders_to_create)
-            db.session.commit()
-            
-            # Schedule with APScheduler
-            for reminder in reminders_to_create:
-                schedule_reminder(reminder.id, medicine.name, user_id, reminder.reminder_time)
         
-        print(f"Generated {len(reminders_to_create)} reminders for medicine {medicine.name}")
-    except Exception as e:
-        print(f"Error generating reminders: {str(e)}")
+    Returns:
+        list of Reminder row dicts, ready for a bulk insert
+    """
+    # Parse timing
+    times_per_day = 1
+    if 'x' in timing.lower():
+        try:
+            times_per_day = int(timing.lower().split('x')[0])
+        except:
+            times_per_day = 1
+    
+    # Build every day x slot reminder time at once, spacing slots through the day
+    import numpy as np
+    days = np.arange(duration_days)
+    hours = 6 + np.arange(times_per_day) * (16 // max(1, times_per_day))
+    reminder_times = (
+        np.datetime64(datetime.now(), 'us')
+        + days[:, None] * np.timedelta64(1, 'D')
+        + hours[None, :] * np.timedelta64(1, 'h')
+    ).ravel()
+    reminder_times = reminder_times[reminder_times > np.datetime64(datetime.utcnow(), 'us')]
+    
+    reminder_rows = [
+        {
+            'medicine_id': medicine_id,
+            'user_id': user_id,
+            'reminder_time': reminder_time,
+            'status': 'pending'
+        }
+        for reminder_time in reminder_times.tolist()
+    ]
+    
+    return reminder_rows
 
 
 # ============================================================================
@@ -451,7 +1292,7 @@ def login():
         
         user = User.query.filter_by(username=username).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        if verify_password(user.password_hash if user else None, password):
             session['user_id'] = user.id
             session['username'] = user.username
             session['name'] = user.name
@@ -480,8 +1321,8 @@ def logout():
 def dashboard():
     """Display home dashboard."""
     try:
-        user_id = session.get('user_id')
-        user = User.query.get(user_id)
+        user_id = current_user_id()
+        user = current_user()
         
         # Upcoming reminders (next 24 hours)
         now = datetime.utcnow()
@@ -495,15 +1336,20 @@ def dashboard():
         
         # Recent prescriptions (last 3)
         recent_prescriptions = Prescription.query.filter_by(user_id=user_id).order_by(
-            Prescription.uploaded_on.desc()
+            Prescription.uploaded_on.desc(), Prescription.id.desc()
         ).limit(3).all()
         
         # Medicine statistics
-        all_medicines = Medicine.query.filter_by(user_id=user_id).all()
-        verified_count = sum(1 for m in all_medicines if m.verified == 'valid')
-        fake_count = sum(1 for m in all_medicines if m.verified == 'fake')
-        suspicious_count = sum(1 for m in all_medicines if m.verified == 'suspicious')
-        total_medicines = len(all_medicines)
+        status_counts = dict(
+            db.session.query(Medicine.verified, func.count(Medicine.id))
+            .filter(Medicine.user_id == user_id)
+            .group_by(Medicine.verified)
+            .all()
+        )
+        verified_count = status_counts.get('valid', 0)
+        fake_count = status_counts.get('fake', 0)
+        suspicious_count = status_counts.get('suspicious', 0)
+        total_medicines = sum(status_counts.values())
         
         verified_percentage = (verified_count / total_medicines * 100) if total_medicines > 0 else 0
         
@@ -532,10 +1378,10 @@ def dashboard():
 @login_required
 def prescriptions():
     """List user's prescriptions."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     page = request.args.get('page', 1, type=int)
     prescriptions_data = Prescription.query.filter_by(user_id=user_id).order_by(
-        Prescription.uploaded_on.desc()
+        Prescription.uploaded_on.desc(), Prescription.id.desc()
     ).paginate(page=page, per_page=10)
     
     return render_template('prescriptions/list.html', prescriptions=prescriptions_data)
@@ -545,90 +1391,181 @@ def prescriptions():
 @login_required
 def upload_prescription():
     """Upload and process prescription image."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     
     if request.method == 'POST':
         if 'file' not in request.files:
             flash('No file part', 'danger')
             return redirect(url_for('upload_prescription'))
         
-        file = request.files['file']
-        if file.filename == '':
+        files = [f for f in request.files.getlist('file') if f.filename != '']
+        if not files:
             flash('No selected file', 'danger')
             return redirect(url_for('upload_prescription'))
         
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
+        if all(allowed_file(f.filename) for f in files):
             # Add timestamp to avoid collisions
-            filename = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{filename}"
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-            file.save(filepath)
+            filepaths = []
+            image_hashes = []
+            for index, file in enumerate(files):
+                filename = secure_filename(file.filename)
+                if len(files) > 1:
+                    filename = f"{index + 1}_{filename}"
+                filename = f"{timestamp}_{filename}"
+                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+                image_hashes.append(save_upload(file, filepath))
+                filepaths.append(filepath)
             
-            # Extract text from prescription
-            extraction_result = extract_from_prescription(filepath)
+            # Extract text in the background; the page polls until review data is ready
+            job = ScanJob(user_id=user_id, status='queued', filepaths=json.dumps(filepaths))
+            db.session.add(job)
+            db.session.commit()
+            submit_ocr_job(job.id, filepaths, image_hashes)
             
-            return render_template(
-                'prescriptions/upload.html',
-                filepath=filepath,
-                raw_text=extraction_result['raw_text'],
-                medicines=extraction_result['medicines'],
-                image_path=f"/{filepath.replace(chr(92), '/')}",
-                step='review'
-            )
+            return render_template('prescriptions/upload.html', job_id=job.id, step='processing')
         else:
             flash('File type not allowed. Use PNG, JPG, GIF, or BMP.', 'danger')
     
     return render_template('prescriptions/upload.html', step='upload')
 
 
+@app.route('/upload-prescription/status/<int:job_id>')
+@login_required
+def upload_status(job_id):
+    """Report the progress of a background OCR job."""
+    user_id = current_user_id()
+    job = ScanJob.query.get_or_404(job_id)
+    
+    if job.user_id != user_id:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 403
+    
+    data = {'success': True, 'status': job.status}
+    if job.status == 'done':
+        data['review_url'] = url_for('review_prescription', job_id=job.id)
+    elif job.status == 'failed':
+        data['error'] = json.loads(job.result_json or '{}').get('error', 'OCR failed')
+    return jsonify(data)
+
+
+@app.route('/upload-prescription/review/<int:job_id>')
+@login_required
+def review_prescription(job_id):
+    """Review the medicines extracted by a finished OCR job."""
+    user_id = current_user_id()
+    job = ScanJob.query.get_or_404(job_id)
+    
+    if job.user_id != user_id:
+        flash('Unauthorized', 'danger')
+        return redirect(url_for('upload_prescription'))
+    
+    if job.status != 'done':
+        flash('Prescription is still being processed.', 'warning')
+        return render_template('prescriptions/upload.html', job_id=job.id, step='processing')
+    
+    review = json.loads(job.result_json)
+    return render_template(
+        'prescriptions/upload.html',
+        filepath=review['filepath'],
+        filepaths=review.get('filepaths', [review['filepath']]),
+        raw_text=review['raw_text'],
+        medicines=review['medicines'],
+        image_paths=review['image_paths'],
+        step='review'
+    )
+
+
 @app.route('/upload-prescription/save', methods=['POST'])
 @login_required
 def save_prescription():
     """Save extracted medicines to database."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     data = request.get_json()
     
     try:
         filepath = data.get('filepath', '')
+        filepaths = data.get('filepaths') or [filepath]
         raw_text = data.get('raw_text', '')
         medicines_data = data.get('medicines', [])
         
-        # Create prescription record
+        # Create prescription record; the first page doubles as its main image
         prescription = Prescription(
             user_id=user_id,
-            filename=os.path.basename(filepath),
-            image_path=filepath,
+            filename=os.path.basename(filepaths[0]),
+            image_path=filepaths[0],
             raw_text=raw_text
         )
         db.session.add(prescription)
         db.session.flush()
         
-        # Create medicine records
+        # Record every uploaded page, in upload order
+        db.session.execute(insert(PrescriptionPage), [
+            {
+                'prescription_id': prescription.id,
+                'page_number': page_number,
+                'filename': os.path.basename(path),
+                'image_path': path
+            }
+            for page_number, path in enumerate(filepaths, start=1)
+        ])
+        
+        # Create medicine records in a single INSERT
+        medicine_rows = [
+            {
+                'prescription_id': prescription.id,
+                'user_id': user_id,
+                'name': med_data.get('name', 'Unknown').strip(),
+                'dosage': med_data.get('dosage', 'Unknown').strip(),
+                'timing': med_data.get('timing', '1x/day').strip(),
+                'duration': int(med_data.get('duration', 7)),
+                'verified': 'unverified'
+            }
+            for med_data in medicines_data
+        ]
         medicine_ids = []
-        for med_data in medicines_data:
-            medicine = Medicine(
-                prescription_id=prescription.id,
-                user_id=user_id,
-                name=med_data.get('name', 'Unknown').strip(),
-                dosage=med_data.get('dosage', 'Unknown').strip(),
-                timing=med_data.get('timing', '1x/day').strip(),
-                duration=int(med_data.get('duration', 7)),
-                verified='unverified'
+        if medicine_rows:
+            result = db.session.execute(
+                insert(Medicine).returning(Medicine.id, sort_by_parameter_order=True),
+                medicine_rows
+            )
+            medicine_ids = [row.id for row in result]
+        
+        # Generate reminders for each medicine, also in a single INSERT
+        medicine_names = {}
+        reminder_rows = []
+        for medicine_id, medicine_row in zip(medicine_ids, medicine_rows):
+            medicine_names[medicine_id] = medicine_row['name']
+            rows = generate_medicine_reminders(
+                medicine_id,
+                user_id,
+                medicine_row['timing'],
+                medicine_row['duration']
             )
-            db.session.add(medicine)
-            db.session.flush()
-            medicine_ids.append(medicine.id)
+            reminder_rows.extend(rows)
+            print(f"Generated {len(rows)} reminders for medicine {medicine_row['name']}")
+        
+        reminders = []
+        if reminder_rows:
+            reminders = db.session.execute(
+                insert(Reminder).returning(
+                    Reminder.id,
+                    Reminder.medicine_id,
+                    Reminder.reminder_time,
+                    sort_by_parameter_order=True
+                ),
+                reminder_rows
+            ).all()
         
         db.session.commit()
         
-        # Generate reminders for each medicine
-        for i, med_data in enumerate(medicines_data):
-            generate_medicine_reminders(
-                medicine_ids[i],
+        # Schedule with APScheduler once the rows are committed
+        for reminder in reminders:
+            schedule_reminder(
+                reminder.id,
+                medicine_names[reminder.medicine_id],
                 user_id,
-                med_data.get('timing', '1x/day'),
-                int(med_data.get('duration', 7))
+                reminder.reminder_time
             )
         
         return jsonify({'success': True, 'prescription_id': prescription.id})
@@ -642,7 +1579,7 @@ def save_prescription():
 @login_required
 def view_prescription(id):
     """View a prescription and its medicines."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     prescription = Prescription.query.get_or_404(id)
     
     if prescription.user_id != user_id:
@@ -656,7 +1593,7 @@ def view_prescription(id):
 @login_required
 def edit_medicine(id):
     """Edit medicine details."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     prescription = Prescription.query.get_or_404(id)
     
     if prescription.user_id != user_id:
@@ -677,6 +1614,7 @@ def edit_medicine(id):
         medicine.updated_at = datetime.utcnow()
         
         db.session.commit()
+        invalidate_authenticity_history(user_id)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -687,8 +1625,14 @@ def edit_medicine(id):
 @login_required
 def delete_prescription(id):
     """Delete a prescription and all associated medicines/reminders."""
-    user_id = session.get('user_id')
-    prescription = Prescription.query.get_or_404(id)
+    user_id = current_user_id()
+    # Load the whole tree up front; the delete cascade walks it anyway
+    medicines = selectinload(Prescription.medicines)
+    prescription = Prescription.query.options(
+        selectinload(Prescription.pages),
+        medicines.selectinload(Medicine.reminders),
+        medicines.selectinload(Medicine.authenticity_logs)
+    ).get_or_404(id)
     
     if prescription.user_id != user_id:
         flash('Unauthorized', 'danger')
@@ -702,6 +1646,7 @@ def delete_prescription(id):
         
         db.session.delete(prescription)
         db.session.commit()
+        invalidate_authenticity_history(user_id)
         flash('Prescription deleted successfully.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -714,8 +1659,11 @@ def delete_prescription(id):
 @login_required
 def delete_medicine(id):
     """Delete a single medicine."""
-    user_id = session.get('user_id')
-    medicine = Medicine.query.get_or_404(id)
+    user_id = current_user_id()
+    medicine = Medicine.query.options(
+        selectinload(Medicine.reminders),
+        selectinload(Medicine.authenticity_logs)
+    ).get_or_404(id)
     
     if medicine.user_id != user_id:
         flash('Unauthorized', 'danger')
@@ -730,6 +1678,7 @@ def delete_medicine(id):
         
         db.session.delete(medicine)
         db.session.commit()
+        invalidate_authenticity_history(user_id)
         flash('Medicine deleted successfully.', 'success')
         
         if prescription_id:
@@ -749,7 +1698,7 @@ def delete_medicine(id):
 @login_required
 def verify_medicine():
     """Verify medicine authenticity using barcode/QR scanning."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     
     if request.method == 'POST':
         if 'file' not in request.files:
@@ -777,7 +1726,7 @@ def verify_medicine():
             # Log to database
             auth_log = AuthenticityLog(
                 user_id=user_id,
-                batch=barcode_data.get('batch', ''),
+                batch=barcode_data.get('batch', '')[:64],
                 expiry=barcode_data.get('expiry', ''),
                 manufacturer=barcode_data.get('manufacturer', ''),
                 verified_status=verified_status,
@@ -797,6 +1746,7 @@ def verify_medicine():
             
             db.session.add(auth_log)
             db.session.commit()
+            invalidate_authenticity_history(user_id)
             
             # Get medicine name from form
             medicine_name = request.form.get('medicine_name', '').strip()
@@ -831,7 +1781,7 @@ def verify_medicine():
 @login_required
 def view_reminders():
     """View all reminders for the user."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     page = request.args.get('page', 1, type=int)
     
     reminders_data = Reminder.query.filter_by(user_id=user_id).order_by(
@@ -845,7 +1795,7 @@ def view_reminders():
 @login_required
 def mark_reminder_taken(id):
     """Mark a reminder as taken."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     reminder = Reminder.query.get_or_404(id)
     
     if reminder.user_id != user_id:
@@ -872,7 +1822,7 @@ def mark_reminder_taken(id):
 @login_required
 def skip_reminder(id):
     """Mark a reminder as skipped."""
-    user_id = session.get('user_id')
+    user_id = current_user_id()
     reminder = Reminder.query.get_or_404(id)
     
     if reminder.user_id != user_id:
@@ -897,23 +1847,46 @@ def skip_reminder(id):
 @login_required
 def authenticity_history():
     """Get user's medicine verification history."""
-    user_id = session.get('user_id')
-    logs = AuthenticityLog.query.filter_by(user_id=user_id).order_by(
-        AuthenticityLog.scanned_on.desc()
-    ).limit(20).all()
-    
-    data = []
-    for log in logs:
-        data.append({
-            'id': log.id,
-            'batch': log.batch,
-            'expiry': log.expiry,
-            'status': log.verified_status,
-            'scanned_on': log.scanned_on.strftime('%Y-%m-%d %H:%M'),
-            'medicine': log.medicine.name if log.medicine else 'Unknown'
-        })
+    user_id = current_user_id()
+    cache_key = f"auth_hist:{user_id}"
+    body = cache_get(cache_key)
+    if body is not None:
+        return json_body_response(body)
     
-    return jsonify(data)
+    # Select only the fields the JSON needs, scan time already formatted;
+    # no ORM objects are built per log
+    stmt = select(
+        AuthenticityLog.id,
+        AuthenticityLog.batch,
+        AuthenticityLog.expiry,
+        AuthenticityLog.verified_status,
+        minute_string(AuthenticityLog.scanned_on),
+        Medicine.name
+    ).outerjoin(
+        Medicine, Medicine.id == AuthenticityLog.medicine_id
+    ).where(
+        AuthenticityLog.user_id == user_id
+    ).order_by(
+        AuthenticityLog.scanned_on.desc(), AuthenticityLog.id.desc()
+    ).limit(20)
+    
+    data = [
+        {
+            'id': log_id,
+            'batch': batch,
+            'expiry': expiry,
+            'status': verified_status,
+            'scanned_on': scanned_on,
+            'medicine': medicine_name or 'Unknown'
+        }
+        for log_id, batch, expiry, verified_status, scanned_on, medicine_name
+        in db.session.execute(stmt)
+    ]
+    
+    # Cache the encoded body so hits skip building and serializing the payload
+    body = dump_json_bytes(data)
+    cache_set(cache_key, body, AUTH_HISTORY_CACHE_TTL)
+    return json_body_response(body)
 
 
 # ============================================================================
@@ -924,37 +1897,76 @@ def authenticity_history():
 @login_required
 def medicines():
     """View all medicines for the user."""
-    user_id = session.get('user_id')
-    medicines_data = Medicine.query.filter_by(user_id=user_id).order_by(
-        Medicine.created_at.desc()
+    user_id = current_user_id()
+    
+    # Template bucket per status; anything else is listed as unverified
+    bucket_names = {'valid': 'verified', 'fake': 'fake', 'suspicious': 'suspicious'}
+    buckets = {'verified': [], 'fake': [], 'suspicious': [], 'unverified': []}
+    counts = dict.fromkeys(buckets, 0)
+    
+    status_counts = db.session.query(Medicine.verified, func.count(Medicine.id)).filter(
+        Medicine.user_id == user_id
+    ).group_by(Medicine.verified).all()
+    for status, count in status_counts:
+        counts[bucket_names.get(status, 'unverified')] += count
+    
+    # One status, paged by id (keyset): ?status=valid&before_id=<last id shown>
+    status = request.args.get('status')
+    before_id = request.args.get('before_id', type=int)
+    next_before_id = None
+    if status in MEDICINE_STATUSES:
+        query = Medicine.query.filter(Medicine.user_id == user_id)
+        if status == 'unverified':
+            query = query.filter(or_(
+                Medicine.verified.notin_(list(bucket_names)),
+                Medicine.verified.is_(None)
+            ))
+        else:
+            query = query.filter(Medicine.verified == status)
+        if before_id:
+            query = query.filter(Medicine.id < before_id)
+        
+        page = query.order_by(Medicine.id.desc()).limit(MEDICINES_PAGE_SIZE + 1).all()
+        if len(page) > MEDICINES_PAGE_SIZE:
+            page = page[:MEDICINES_PAGE_SIZE]
+            next_before_id = page[-1].id
+        buckets[bucket_names.get(status, 'unverified')] = page
+        
+        return render_template(
+            'medicines/list.html',
+            counts=counts,
+            status=status,
+            next_before_id=next_before_id,
+            **buckets
+        )
+    
+    # Overview: only the newest few medicines of each status are listed
+    ranked = select(
+        Medicine,
+        func.row_number().over(
+            partition_by=Medicine.verified,
+            order_by=(Medicine.created_at.desc(), Medicine.id.desc())
+        ).label('status_rank')
+    ).where(Medicine.user_id == user_id).subquery()
+    ranked_medicine = aliased(Medicine, ranked)
+    recent_medicines = db.session.scalars(
+        select(ranked_medicine).where(
+            ranked.c.status_rank <= MEDICINES_PER_STATUS
+        ).order_by(ranked.c.created_at.desc(), ranked.c.id.desc())
     ).all()
     
-    # Group by verification status
-    verified = [m for m in medicines_data if m.verified == 'valid']
-    fake = [m for m in medicines_data if m.verified == 'fake']
-    suspicious = [m for m in medicines_data if m.verified == 'suspicious']
-    unverified = [m for m in medicines_data if m.verified == 'unverified']
+    for medicine in recent_medicines:
+        bucket = buckets[bucket_names.get(medicine.verified, 'unverified')]
+        if len(bucket) < MEDICINES_PER_STATUS:
+            bucket.append(medicine)
     
-    return render_template(
-        'medicines/list.html',
-        verified=verified,
-        fake=fake,
-        suspicious=suspicious,
-        unverified=unverified
-    )
+    return render_template('medicines/list.html', counts=counts, **buckets)
 
 
 # ============================================================================
 # INITIALIZATION & UTILITIES
 # ============================================================================
 
-@app.before_request
-def create_upload_folder():
-    """Create upload folder if it doesn't exist."""
-    if not os.path.exists(app.config['UPLOAD_FOLDER']):
-        os.makedirs(app.config['UPLOAD_FOLDER'])
-
-
 @app.shell_context_processor
 def make_shell_context():
     """Make models available in flask shell."""
@@ -962,21 +1974,29 @@ def make_shell_context():
         'db': db,
         'User': User,
         'Prescription': Prescription,
+        'PrescriptionPage': PrescriptionPage,
         'Medicine': Medicine,
         'AuthenticityLog': AuthenticityLog,
-        'Reminder': Reminder
+        'Reminder': Reminder,
+        'ScanJob': ScanJob,
+        'OCRCache': OCRCache
     }
 
 
+# Library availability is fixed at import time, so the template context is built once
+_CONFIG_CTX = dict(
+    easyocr_available=EASYOCR_AVAILABLE,
+    pytesseract_available=PYTESSERACT_AVAILABLE,
+    tesserocr_available=TESSEROCR_AVAILABLE,
+    cv2_available=CV2_AVAILABLE,
+    pyzbar_available=PYZBAR_AVAILABLE
+)
+
+
 @app.context_processor
 def inject_config():
     """Inject config into templates."""
-    return dict(
-        easyocr_available=EASYOCR_AVAILABLE,
-        pytesseract_available=PYTESSERACT_AVAILABLE,
-        cv2_available=CV2_AVAILABLE,
-        pyzbar_available=PYZBAR_AVAILABLE
-    )
+    return _CONFIG_CTX
 
 
 # ============================================================================
@@ -990,6 +2010,10 @@ def init_app():
             # Create database tables
             try:
                 db.create_all()
+                # create_all skips existing tables, so add any indexes defined since
+                for table in db.metadata.sorted_tables:
+                    for index in table.indexes:
+                        index.create(db.engine, checkfirst=True)
                 print("Database tables created successfully")
             except Exception as e:
                 print(f"Database creation error (may already exist): {e}")
@@ -1012,7 +2036,7 @@ def init_app():
             elif is_production_render:
                 print("Production mode detected - Scheduler disabled for Render.com")
             
-            # Create upload folder
+            # Create upload folder (once at startup, not per request)
             try:
                 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
                 print(f"Upload folder ready: {app.config['UPLOAD_FOLDER']}")
@@ -1036,6 +2060,7 @@ if __name__ == '__main__':
     print("="*60)
     print(f"EasyOCR Available: {EASYOCR_AVAILABLE}")
     print(f"Pytesseract Available: {PYTESSERACT_AVAILABLE}")
+    print(f"Tesserocr Available: {TESSEROCR_AVAILABLE}")
     print(f"OpenCV Available: {CV2_AVAILABLE}")
     print(f"Pyzbar Available: {PYZBAR_AVAILABLE}")
     print("="*60)
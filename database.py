@@ -2,12 +2,36 @@
 SQLAlchemy ORM models for MediGuard application.
 Complete database schema with all required tables.
 """
-from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 
 db = SQLAlchemy()
 
 
+class utcnow(FunctionElement):
+    """
+    Current UTC time, evaluated by the database.
+    Used as both the INSERT default and the DDL server default, so timestamps come
+    from the database clock and tables created before the server defaults still work.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def compile_utcnow(element, compiler, **kw):
+    """SQLite (default) rendering; CURRENT_TIMESTAMP is already UTC there."""
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, 'postgresql')
+def compile_utcnow_postgresql(element, compiler, **kw):
+    """PostgreSQL rendering; CURRENT_TIMESTAMP is in the session time zone."""
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
 class User(db.Model):
     """User model for authentication and account management."""
     __tablename__ = 'users'
@@ -18,14 +42,15 @@ class User(db.Model):
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
     phone = db.Column(db.String(20), nullable=True)
-    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow())
-    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
     
     # Relationships
     prescriptions = db.relationship('Prescription', backref='user', lazy=True, cascade='all, delete-orphan')
     medicines = db.relationship('Medicine', backref='user', lazy=True, cascade='all, delete-orphan')
     reminders = db.relationship('Reminder', backref='user', lazy=True, cascade='all, delete-orphan')
     authenticity_logs = db.relationship('AuthenticityLog', backref='user', lazy=True, cascade='all, delete-orphan')
+    scan_jobs = db.relationship('ScanJob', backref='user', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<User {self.username}>'
@@ -40,15 +65,37 @@ class Prescription(db.Model):
     filename = db.Column(db.String(255), nullable=False)
     image_path = db.Column(db.String(500), nullable=False)
     raw_text = db.Column(db.Text, nullable=True)
-    uploaded_on = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow())
+    uploaded_on = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
+    
+    __table_args__ = (
+        db.Index('ix_prescription_user_uploaded', user_id, uploaded_on),
+    )
     
     # Relationships
     medicines = db.relationship('Medicine', backref='prescription', lazy=True, cascade='all, delete-orphan')
+    pages = db.relationship(
+        'PrescriptionPage', backref='prescription', lazy=True, cascade='all, delete-orphan',
+        order_by='PrescriptionPage.page_number'
+    )
     
     def __repr__(self):
         return f'<Prescription {self.id} by User {self.user_id}>'
 
 
+class PrescriptionPage(db.Model):
+    """PrescriptionPage model for each uploaded image of a multi-page prescription."""
+    __tablename__ = 'prescription_pages'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prescription_id = db.Column(db.Integer, db.ForeignKey('prescriptions.id'), nullable=False, index=True)
+    page_number = db.Column(db.Integer, nullable=False)  # 1-based, in upload order
+    filename = db.Column(db.String(255), nullable=False)
+    image_path = db.Column(db.String(500), nullable=False)
+    
+    def __repr__(self):
+        return f'<PrescriptionPage {self.page_number} of Prescription {self.prescription_id}>'
+
+
 class Medicine(db.Model):
     """Medicine model for tracking medicines from prescriptions."""
     __tablename__ = 'medicines'
@@ -61,8 +108,16 @@ class Medicine(db.Model):
     timing = db.Column(db.String(128), nullable=False)  # e.g., "2x/day", "morning, evening"
     duration = db.Column(db.Integer, nullable=False)  # in days
     verified = db.Column(db.String(50), default="unverified")  # valid, fake, suspicious, unverified
-    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow())
-    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow(), onupdate=lambda: datetime.utcnow())
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
+    
+    __table_args__ = (
+        # Per-user lookups, the dashboard's status counts (index-only GROUP BY)
+        # and the medicines page's per-status keyset pages (ordered by id)
+        db.Index('ix_medicine_user_verified_id', user_id, verified, id),
+        # Medicines page: a user's medicines, newest first
+        db.Index('ix_medicine_user_created_desc', user_id, created_at.desc()),
+    )
     
     # Relationships
     reminders = db.relationship('Reminder', backref='medicine', lazy=True, cascade='all, delete-orphan')
@@ -78,14 +133,19 @@ class AuthenticityLog(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id'), nullable=True)
-    batch = db.Column(db.String(255), nullable=True)  # batch number
+    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id'), nullable=True, index=True)
+    batch = db.Column(db.String(64), nullable=True, index=True)  # batch number
     expiry = db.Column(db.String(50), nullable=True)  # expiry date
     manufacturer = db.Column(db.String(255), nullable=True)  # manufacturer info
     verified_status = db.Column(db.String(50), nullable=False)  # valid, fake, suspicious
-    scanned_on = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow())
+    scanned_on = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
     details = db.Column(db.Text, nullable=True)  # Additional verification details
     
+    __table_args__ = (
+        # Verification history: a user's latest scans
+        db.Index('ix_auth_logs_user_scanned', user_id, scanned_on.desc()),
+    )
+    
     def __repr__(self):
         return f'<AuthenticityLog {self.id}: {self.verified_status}>'
 
@@ -99,7 +159,50 @@ class Reminder(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     reminder_time = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String(50), default="pending")  # pending, taken, skipped, completed
-    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.utcnow())
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
+    
+    __table_args__ = (
+        # Dashboard: a user's pending reminders in a time window
+        db.Index('ix_reminder_user_status_time', user_id, status, reminder_time),
+        # Reminders page: a user's reminders, newest first
+        db.Index('ix_reminder_user_time_desc', user_id, reminder_time.desc()),
+        # Scheduler startup: all pending reminders across users; partial, so
+        # taken/skipped reminders stay out of the index
+        db.Index(
+            'ix_reminders_pending_time', reminder_time,
+            postgresql_where=db.text("status = 'pending'"),
+            sqlite_where=db.text("status = 'pending'")
+        ),
+    )
     
     def __repr__(self):
         return f'<Reminder {self.id} at {self.reminder_time}>'
+
+
+class ScanJob(db.Model):
+    """ScanJob model for prescription OCR running in the background."""
+    __tablename__ = 'scan_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, processing, done, failed
+    filepaths = db.Column(db.Text, nullable=False)  # JSON list of uploaded image paths
+    result_json = db.Column(db.Text, nullable=True)  # review data once done, error once failed
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
+    
+    def __repr__(self):
+        return f'<ScanJob {self.id}: {self.status}>'
+
+
+class OCRCache(db.Model):
+    """OCRCache model for reusing OCR results of previously seen images."""
+    __tablename__ = 'ocr_cache'
+    
+    image_hash = db.Column(db.String(64), primary_key=True)  # xxh3/blake2b hex digest of image bytes
+    backend = db.Column(db.String(20), primary_key=True)  # easyocr, tesseract
+    raw_text = db.Column(db.Text, nullable=False)
+    medicines_json = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow(), server_default=utcnow())
+    
+    def __repr__(self):
+        return f'<OCRCache {self.image_hash[:12]} ({self.backend})>'
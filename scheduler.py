@@ -4,6 +4,7 @@ Manages background scheduling of medicine reminders.
 """
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.date import DateTrigger
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import logging
 
@@ -98,19 +99,34 @@ def reschedule_existing_reminders(db_session, Reminder, Medicine):
     """
     try:
         now = datetime.utcnow()
-        pending_reminders = db_session.query(Reminder).filter(
+        # Load each reminder's medicine name in the same query, streaming rows in
+        # chunks so memory stays flat however many reminders are pending
+        pending_reminders = db_session.query(Reminder).options(
+            joinedload(Reminder.medicine).load_only(Medicine.name)
+        ).filter(
             Reminder.status == 'pending',
             Reminder.reminder_time > now
-        ).all()
+        ).execution_options(stream_results=True).yield_per(500)
         
-        for reminder in pending_reminders:
-            medicine = reminder.medicine
-            schedule_reminder(
-                reminder.id,
-                medicine.name,
-                reminder.user_id,
-                reminder.reminder_time
-            )
-        logger.info(f"Rescheduled {len(pending_reminders)} pending reminders from database")
+        # Pause job processing while adding the batch; otherwise every add_job
+        # wakes the scheduler thread to re-scan the job store
+        paused = scheduler.running
+        if paused:
+            scheduler.pause()
+        rescheduled = 0
+        try:
+            for reminder in pending_reminders:
+                medicine = reminder.medicine
+                schedule_reminder(
+                    reminder.id,
+                    medicine.name,
+                    reminder.user_id,
+                    reminder.reminder_time
+                )
+                rescheduled += 1
+        finally:
+            if paused:
+                scheduler.resume()
+        logger.info(f"Rescheduled {rescheduled} pending reminders from database")
     except Exception as e:
         logger.error(f"Error rescheduling existing reminders: {str(e)}")
@@ -3,8 +3,9 @@ Seed script to populate MediGuard database with test data
 Run with: python seed.py
 """
 from datetime import datetime, timedelta
+from sqlalchemy import insert
 from app import app, db
-from database import User, Prescription, Medicine, Reminder, AuthenticityLog
+from database import User, Prescription, PrescriptionPage, Medicine, Reminder, AuthenticityLog, ScanJob, OCRCache
 from werkzeug.security import generate_password_hash
 import os
 
@@ -16,12 +17,17 @@ def seed_database():
         
         # Clear existing data (optional)
         print("Clearing existing data...")
+        # Bulk deletes skip ORM cascades, so children go before their parents
         db.session.query(Reminder).delete()
         db.session.query(AuthenticityLog).delete()
         db.session.query(Medicine).delete()
+        db.session.query(PrescriptionPage).delete()
         db.session.query(Prescription).delete()
+        db.session.query(ScanJob).delete()
+        db.session.query(OCRCache).delete()
         db.session.query(User).delete()
-        db.session.commit()
+        
+        # Everything below runs in the same transaction and is committed once at the end
         
         print("Creating test user...")
         # Create test user
@@ -29,7 +35,8 @@ def seed_database():
             name='John Doe',
             username='johndoe',
             email='john@example.com',
-            password_hash=generate_password_hash('password123'),
+            # Test account with a published password; a low work factor keeps seeding fast
+            password_hash=generate_password_hash('password123', method='pbkdf2:sha256:10000'),
             phone='+1-555-0123'
         )
         db.session.add(user)
@@ -79,59 +86,59 @@ def seed_database():
             }
         ]
         
-        medicine_ids = []
-        for med_data in medicines_data:
-            medicine = Medicine(
-                prescription_id=prescription.id if medicine_ids == [] else None,
-                user_id=user.id,
-                name=med_data['name'],
-                dosage=med_data['dosage'],
-                timing=med_data['timing'],
-                duration=med_data['duration'],
-                verified=med_data['verified']
-            )
-            db.session.add(medicine)
-            db.session.flush()
-            medicine_ids.append(medicine.id)
+        # One multi-row INSERT; ids come back in the order of medicines_data
+        medicine_rows = [
+            {
+                'prescription_id': prescription.id if index == 0 else None,
+                'user_id': user.id,
+                **med_data
+            }
+            for index, med_data in enumerate(medicines_data)
+        ]
+        medicine_ids = db.session.scalars(
+            insert(Medicine).returning(Medicine.id, sort_by_parameter_order=True),
+            medicine_rows
+        ).all()
         
         print("Creating test reminders...")
         # Create test reminders
         now = datetime.utcnow()
-        for i, med_id in enumerate(medicine_ids[:2]):
-            for day in range(3):
-                for time_slot in range(2):
-                    reminder_time = now + timedelta(days=day, hours=6 + time_slot*12)
-                    reminder = Reminder(
-                        medicine_id=med_id,
-                        user_id=user.id,
-                        reminder_time=reminder_time,
-                        status='pending'
-                    )
-                    db.session.add(reminder)
+        reminder_rows = [
+            {
+                'medicine_id': med_id,
+                'user_id': user.id,
+                'reminder_time': now + timedelta(days=day, hours=6 + time_slot*12),
+                'status': 'pending'
+            }
+            for med_id in medicine_ids[:2]
+            for day in range(3)
+            for time_slot in range(2)
+        ]
+        db.session.execute(insert(Reminder), reminder_rows)
         
         print("Creating test authenticity logs...")
         # Create test authenticity logs
-        auth_log_1 = AuthenticityLog(
-            user_id=user.id,
-            medicine_id=medicine_ids[0],
-            batch='BATCH2024001',
-            expiry='2026-12-31',
-            manufacturer='MediCorp Pharma',
-            verified_status='valid',
-            details='Valid MediGuard barcode detected\nBatch number format valid: BATCH2024001\nExpiry valid until 2026-12-31\nManufacturer: MediCorp Pharma'
-        )
-        
-        auth_log_2 = AuthenticityLog(
-            user_id=user.id,
-            medicine_id=medicine_ids[3],
-            batch='BATCH2023999',
-            expiry='2023-06-15',
-            manufacturer='Unknown',
-            verified_status='fake',
-            details='Medicine already expired on 2023-06-15'
-        )
-        
-        db.session.add_all([auth_log_1, auth_log_2])
+        auth_log_rows = [
+            {
+                'user_id': user.id,
+                'medicine_id': medicine_ids[0],
+                'batch': 'BATCH2024001',
+                'expiry': '2026-12-31',
+                'manufacturer': 'MediCorp Pharma',
+                'verified_status': 'valid',
+                'details': 'Valid MediGuard barcode detected\nBatch number format valid: BATCH2024001\nExpiry valid until 2026-12-31\nManufacturer: MediCorp Pharma'
+            },
+            {
+                'user_id': user.id,
+                'medicine_id': medicine_ids[3],
+                'batch': 'BATCH2023999',
+                'expiry': '2023-06-15',
+                'manufacturer': 'Unknown',
+                'verified_status': 'fake',
+                'details': 'Medicine already expired on 2023-06-15'
+            }
+        ]
+        db.session.execute(insert(AuthenticityLog), auth_log_rows)
         db.session.commit()
         
         print("\n" + "="*60)